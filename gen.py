@@ -1,15 +1,132 @@
 from datetime import datetime, timedelta
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from itertools import accumulate
+from string import Template
+from typing import TextIO
 import csv
 import random
 import math
+import os
+import sys
 
 
 DOUBLE_BACKSLASH = "\\\\"
 BACKSLASH = "\\"
 NEWLINE = "\n"
 
+# Below this many events, starting a process pool costs more than rendering
+PARALLEL_RENDER_MIN_EVENTS = 64
+
+HEAT_ROW = "%d & %s & %s & %s &" + DOUBLE_BACKSLASH
+NUMBERED_HEAT_ROW = "%d & %d & %s & %s & %s &" + DOUBLE_BACKSLASH
+CONTINUED_HEAT_ROW = " & %d & %s & %s & %s &" + DOUBLE_BACKSLASH
+
+PREAMBLE_TEMPLATE = Template(
+    r"""\documentclass[10pt]{article}
+\usepackage[margin=0.5in]{geometry}
+\usepackage{booktabs}
+\usepackage{multicol}
+\usepackage{titlesec}
+\usepackage{enumitem}
+
+\titleformat{\section}{\large\bfseries}{}{0em}{}
+\titleformat{\subsection}{\normalsize\bfseries}{}{0em}{}
+
+\setlist[itemize]{noitemsep, topsep=0pt}
+\setlength{\parindent}{0pt}
+
+\begin{document}
+
+\begin{center}
+    \LARGE \textbf{$name} \\
+    \large
+    \vspace{0.5em}
+    \textbf{Date:} $date \hspace{2cm} \textbf{Location:} $location \\
+    \textbf{Host:} $host
+\end{center}
+"""
+)
+
+MEET_INFO_TEMPLATE = Template(
+    r"""
+\vspace{1em}
+
+\section*{Meet Information}
+$description
+
+\vspace{1em}
+
+\section*{Meet History}
+$meet_history
+
+\vspace{1em}
+
+"""
+)
+
+TEAMS_TEMPLATE = Template(
+    r"""
+
+\vspace{2em}
+\section*{Teams}
+
+$teams
+
+\twocolumn
+
+"""
+)
+
+EVENT_LIST_TEMPLATE = Template(
+    r"""\section*{Event List}
+
+\begin{tabular}{@{}lllll@{}}
+\toprule
+\textbf{Event \#} & \textbf{Event Name} &  \textbf{Time} \\
+\midrule
+$events
+\bottomrule
+\end{tabular}
+"""
+)
+
+EVENT_TITLE_TEMPLATE = Template(
+    r"""
+\textbf{Event:} $name \quad \textbf{Time:} $time 
+
+"""
+)
+
+HEAT_TABLE_HEAD_TEMPLATE = Template(
+    r"""\vspace{1em}
+\begin{tabular}{@{}$column_spec@{}}
+\toprule
+$heat_column
+\textbf{$lane_label} & \textbf{Athlete Name} & \textbf{Team} & \textbf{$mark_label} \\
+\midrule
+"""
+)
+
+NO_ENTRIES = r"""\textit{No entries.}
+\vspace{2.5em}
+"""
+
+HEAT_TABLE_FOOT = r"""
+\bottomrule
+\end{tabular}
+\vspace{2.5em}
+"""
+
+DOCUMENT_END = r"""
+
+\end{document}
+"""
+
 
 class Team(Enum):
     ONE = "Gary"
@@ -26,13 +143,28 @@ class EventKind(Enum):
         return self in (EventKind.TRACK, EventKind.RELAY)
 
 
-@dataclass
+TEAM_VALUES = {team: team.value for team in Team}
+
+# Heat table header for every event kind, with and without a heat column
+HEAT_TABLE_HEADS = {
+    (kind, numbered): HEAT_TABLE_HEAD_TEMPLATE.substitute(
+        column_spec="llllll" if numbered else "lllll",
+        heat_column=BACKSLASH + "textbf{{Heat}} &" if numbered else "",
+        lane_label="Lane" if kind is EventKind.TRACK else "Order",
+        mark_label="Seed" if kind.is_run() else "Mark",
+    )
+    for kind in EventKind
+    for numbered in (False, True)
+}
+
+
+@dataclass(slots=True, frozen=True)
 class Athlete:
     name: str
     team: Team
 
 
-@dataclass
+@dataclass(slots=True)
 class EventDef:
     name: str
     duration: int  # In minutes
@@ -43,105 +175,156 @@ class EventDef:
     std_dev: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Event:
     name: str
     time: str
-    heats: list[list[tuple[Athlete, str]]]
+    heats: tuple[tuple[tuple[Athlete, str], ...], ...]
     kind: EventKind
+    is_run: bool
     average: float
     std_dev: float
 
 
 def gen_event_list(events: list[Event]) -> str:
-    return f"""\\section*{{Event List}}
-
-\\begin{{tabular}}{{@{{}}lllll@{{}}}}
-\\toprule
-\\textbf{{Event \\#}} & \\textbf{{Event Name}} &  \\textbf{{Time}} \\\\
-\\midrule
-{
-    (NEWLINE).join(
-        f"{i + 1} & {event.name} & {event.time} {DOUBLE_BACKSLASH}"
-        for i, event in enumerate(events)
+    return EVENT_LIST_TEMPLATE.substitute(
+        events=(NEWLINE).join(
+            [
+                rf"{i + 1} & {event.name} & {event.time} \\"
+                for i, event in enumerate(events)
+            ]
+        )
     )
-}
-\\bottomrule
-\\end{{tabular}}
-"""
+
+
+def split_mmss(seed_time: float) -> tuple[int, int]:
+    # Whole minutes and truncated tenths of a second
+    minutes, seconds = divmod(seed_time, 60)
+    return int(minutes), math.floor(seconds * 10)
 
 
 def format_seed_time(seed_time: float, average: float) -> str:
     if average < 60:
         return f"{seed_time:.2f}"
-    truncated_seconds = math.floor(seed_time % 60 * 10) / 10
-    return f"{int(seed_time // 60)}:{truncated_seconds:04.1f}"
+    minutes, tenths = split_mmss(seed_time)
+    return f"{minutes}:{tenths // 10:02d}.{tenths % 10}"
+
+
+def format_times(times: list[float], average: float, is_run: bool) -> list[str]:
+    if is_run and average >= 60:
+        return [format_seed_time(seed_time, average) for seed_time in times]
+    return [f"{mark:.2f}" for mark in times]
 
 
 def render_heat(
-    heat: list[tuple[Athlete, str]], heat_number: int | None, event: Event
+    heat: tuple[tuple[Athlete, str], ...], heat_number: int | None, event: Event
 ) -> str:
-    if heat_number is not None:
-        return (NEWLINE).join(
-            f"{heat_number if i==0 else ''} & {i + 1} & {athlete.name} & {athlete.team.value} & {seed} &{DOUBLE_BACKSLASH}"
-            for i, (athlete, seed) in enumerate(heat)
-        )
-    else:
-        return (NEWLINE).join(
-            f"{i + 1} & {athlete.name} & {athlete.team.value} & {seed} &{DOUBLE_BACKSLASH}"
-            for i, (athlete, seed) in enumerate(heat)
-        )
+    if heat_number is None:
+        rows = [
+            HEAT_ROW % (i, athlete.name, TEAM_VALUES[athlete.team], seed)
+            for i, (athlete, seed) in enumerate(heat, 1)
+        ]
+        return (NEWLINE).join(rows)
+    # Only the first row of a heat carries the heat number
+    athlete, seed = heat[0]
+    rows = [
+        NUMBERED_HEAT_ROW
+        % (heat_number, 1, athlete.name, TEAM_VALUES[athlete.team], seed)
+    ]
+    rows += [
+        CONTINUED_HEAT_ROW % (i, athlete.name, TEAM_VALUES[athlete.team], seed)
+        for i, (athlete, seed) in enumerate(heat[1:], 2)
+    ]
+    return (NEWLINE).join(rows)
 
 
+@lru_cache(maxsize=256)
 def render_event_heat(event: Event) -> str:
-    return f"""
-\\textbf{{Event:}} {event.name} \\quad \\textbf{{Time:}} {event.time} 
-
-\\vspace{{1em}}
-\\begin{{tabular}}{{@{{}}{"lllll" if len(event.heats) == 1 else "llllll"}@{{}}}}
-\\toprule
-{
-    BACKSLASH + "textbf{{Heat}} &" if len(event.heats) > 1 else ""
-}
-\\textbf{{{
-    'Lane' if event.kind == EventKind.TRACK else 'Order'
-}}} & \\textbf{{Athlete Name}} & \\textbf{{Team}} & \\textbf{{{
-    'Seed' if event.kind in (EventKind.TRACK, EventKind.RELAY) else 'Mark'
-}}} \\\\
-\\midrule
-{
-    (NEWLINE).join(
-        render_heat(heat, i + 1 if len(event.heats) > 1 else None, event)
-        for i, heat in enumerate(event.heats)
+    title = EVENT_TITLE_TEMPLATE.substitute(name=event.name, time=event.time)
+    if not event.heats:
+        return title + NO_ENTRIES
+    numbered = len(event.heats) > 1
+    return "".join(
+        [
+            title,
+            HEAT_TABLE_HEADS[event.kind, numbered],
+            (NEWLINE).join(
+                [
+                    render_heat(heat, i + 1 if numbered else None, event)
+                    for i, heat in enumerate(event.heats)
+                ]
+            ),
+            HEAT_TABLE_FOOT,
+        ]
     )
-}
-\\bottomrule
-\\end{{tabular}}
-\\vspace{{2.5em}}
-"""
 
 
 def make_heats(
     entries: list[Athlete], max_heat_size: int, avg: float, std_dev: float, is_run: bool
-) -> list[list[tuple[Athlete, str]]]:
+) -> tuple[tuple[tuple[Athlete, str], ...], ...]:
     random.shuffle(entries)
-    heats: list[list[tuple[Athlete, str]]] = []
-    times = [max(0, random.gauss(avg, std_dev)) for _ in range(len(entries))]
-    if is_run:
-        times.sort()
-    else:
-        times.sort(reverse=True)
-    for i in range(0, len(entries), max_heat_size):
-        heat: list[tuple[Athlete, str]] = []
-        for j in range(i, min(i + max_heat_size, len(entries))):
-            mark = times.pop(0)
-            if is_run:
-                mark = format_seed_time(mark, avg)
-            else:
-                mark = f"{mark:.2f}"
-            heat.append((entries[j], mark))
-        heats.append(heat)
-    return heats
+    gauss = random.gauss
+    times = sorted(
+        (t if (t := gauss(avg, std_dev)) > 0 else 0.0 for _ in range(len(entries))),
+        reverse=not is_run,
+    )
+    seeded = tuple(zip(entries, format_times(times, avg, is_run)))
+    return tuple(
+        seeded[i : i + max_heat_size] for i in range(0, len(seeded), max_heat_size)
+    )
+
+
+def process_event(event: EventDef, time: str) -> Event:
+    is_run = event.kind.is_run()
+    heats = make_heats(
+        event.entries,
+        event.max_heat_size,
+        event.average,
+        event.std_dev,
+        is_run,
+    )
+    return Event(
+        name=event.name,
+        time=time,
+        kind=event.kind,
+        is_run=is_run,
+        heats=heats,
+        average=event.average,
+        std_dev=event.std_dev,
+    )
+
+
+def render_event_heats(events: list[Event]) -> Iterable[str]:
+    if len(events) < PARALLEL_RENDER_MIN_EVENTS:
+        return map(render_event_heat, events)
+    chunksize = max(1, len(events) // (os.cpu_count() or 1))
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(render_event_heat, events, chunksize=chunksize))
+
+
+def format_clock(seconds: int) -> str:
+    # Seconds since midnight as a 12-hour clock time, e.g. "6:03 PM"
+    hour, minute = divmod(seconds // 60 % (24 * 60), 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def event_start_times(
+    events: list[EventDef], start_time: datetime, between_event_time: timedelta
+) -> list[str]:
+    gap = int(between_event_time.total_seconds())
+    offsets = accumulate(
+        (event.duration * 60 + gap for event in events),
+        initial=start_time.hour * 3600 + start_time.minute * 60 + start_time.second,
+    )
+    return [format_clock(seconds) for _, seconds in zip(events, offsets)]
+
+
+def team_rosters(events: list[EventDef]) -> dict[Team, set[str]]:
+    roster: dict[Team, set[str]] = {Team.ONE: set(), Team.TWO: set()}
+    for event in events:
+        for athlete in event.entries:
+            roster[athlete.team].add(athlete.name)
+    return roster
 
 
 def generate_heat_sheet(
@@ -154,92 +337,45 @@ def generate_heat_sheet(
     events: list[EventDef],
     start_time: datetime,
     between_event_time: timedelta,
-) -> str:
-    proc_events: list[Event] = []
-    for event in events:
-        time_delta = timedelta(minutes=event.duration)
-        proc_events.append(
-            Event(
-                name=event.name,
-                time=start_time.strftime("%-I:%M %p"),
-                kind=event.kind,
-                heats=make_heats(
-                    event.entries,
-                    event.max_heat_size,
-                    event.average,
-                    event.std_dev,
-                    event.kind.is_run(),
-                ),
-                average=event.average,
-                std_dev=event.std_dev,
-            )
+    out: TextIO | None = None,
+) -> str | None:
+    team_dict = team_rosters(events)
+    proc_events = [
+        process_event(event, event_time)
+        for event, event_time in zip(
+            events, event_start_times(events, start_time, between_event_time)
         )
-        start_time += time_delta + between_event_time
-
-    team_dict = {Team.ONE: set(), Team.TWO: set()}
-    for event in proc_events:
-        for heat in event.heats:
-            for athlete, _ in heat:
-                team_dict[athlete.team].add(athlete.name)
-
-    return f"""\\documentclass[10pt]{{article}}
-\\usepackage[margin=0.5in]{{geometry}}
-\\usepackage{{booktabs}}
-\\usepackage{{multicol}}
-\\usepackage{{titlesec}}
-\\usepackage{{enumitem}}
-
-\\titleformat{{\\section}}{{\\large\\bfseries}}{{}}{{0em}}{{}}
-\\titleformat{{\\subsection}}{{\\normalsize\\bfseries}}{{}}{{0em}}{{}}
-
-\\setlist[itemize]{{noitemsep, topsep=0pt}}
-\\setlength{{\\parindent}}{{0pt}}
-
-\\begin{{document}}
-
-\\begin{{center}}
-    \\LARGE \\textbf{{{name}}} \\\\
-    \\large
-    \\vspace{{0.5em}}
-    \\textbf{{Date:}} {date} \\hspace{{2cm}} \\textbf{{Location:}} {location} \\\\
-    \\textbf{{Host:}} {host}
-\\end{{center}}
-
-\\vspace{{1em}}
-
-\\section*{{Meet Information}}
-{description}
-
-\\vspace{{1em}}
-
-\\section*{{Meet History}}
-{meet_history}
-
-\\vspace{{1em}}
-
-{gen_event_list(proc_events)}
-
-\\vspace{{2em}}
-\\section*{{Teams}}
+    ]
 
-{
-    (NEWLINE+DOUBLE_BACKSLASH).join(
-        f"{BACKSLASH}textbf{{{team.value}}}: {', '.join(sorted(team_dict[team]))}"
-        for team in Team
+    teams = (NEWLINE + DOUBLE_BACKSLASH).join(
+        [
+            rf"\textbf{{{TEAM_VALUES[team]}}}: {', '.join(sorted(team_dict[team]))}"
+            for team in Team
+        ]
     )
-}
-
-\\twocolumn
-
-{
-    (NEWLINE).join(
-        render_event_heat(event)
-        for event in proc_events
+    # Stream chunks straight to out when given, otherwise collect and join them
+    parts: list[str] = []
+    write = parts.append if out is None else out.write
+    write(
+        PREAMBLE_TEMPLATE.substitute(
+            name=name, date=date, location=location, host=host
+        )
     )
-}
-
-\\end{{document}}
-"""
+    write(
+        MEET_INFO_TEMPLATE.substitute(
+            description=description, meet_history=meet_history
+        )
+    )
+    write(gen_event_list(proc_events))
+    write(TEAMS_TEMPLATE.substitute(teams=teams))
+    for i, rendered in enumerate(render_event_heats(proc_events)):
+        if i > 0:
+            write(NEWLINE)
+        write(rendered)
+    write(DOCUMENT_END)
+    if out is None:
+        return "".join(parts)
+    return None
 
 
 def parse_entries(
@@ -248,21 +384,31 @@ def parse_entries(
     name_map: dict[str, Athlete],
     event_map: dict[str, EventDef],
 ) -> None:
-    entry_map: dict[str, list[Athlete]] = {}
+    entry_map: dict[str, list[Athlete]] = defaultdict(list)
+    name_map = {sys.intern(key): athlete for key, athlete in name_map.items()}
+    event_map = {sys.intern(key): event for key, event in event_map.items()}
+    # Aliases of the same event share one entry list, keyed by its lowered name
+    entry_keys = {key: event.name.lower() for key, event in event_map.items()}
 
     with open(file_path, "r") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader)
+        events_col = header.index("List of events")
+        name_col = header.index("Name")
         for row in reader:
-            selected_events = row["List of events"].strip().split(",")
-            for i in range(len(selected_events)):
-                selected_events[i] = selected_events[i].strip().lower()
-            athlete_name = row["Name"].strip().lower()
+            if not row:
+                continue
+            selected_events = [
+                sys.intern(event_name.strip())
+                for event_name in row[events_col].lower().split(",")
+            ]
+            athlete_name = sys.intern(row[name_col].strip().lower())
+            athlete = name_map.get(athlete_name)
             for event_name in selected_events:
                 event = event_map.get(event_name)
                 if event:
-                    athlete = name_map.get(athlete_name)
                     if athlete:
-                        entry_map.setdefault(event.name.lower(), []).append(athlete)
+                        entry_map[entry_keys[event_name]].append(athlete)
                     else:
                         print(f"Athlete '{athlete_name}' not found in name map.")
                 else:
@@ -441,13 +587,12 @@ if __name__ == "__main__":
         },
     )
     with open("heat_sheet.tex", "w") as f:
-        f.write(
-            generate_heat_sheet(
-                name="Sean Dutton Memorial Ocean Tendie Invitational",
-                date="May 13, 2025",
-                location="Gesling Stadium",
-                host="Carnegie Mellon University",
-                description="""This prestigious event honors the legacy of Sean Dutton, featuring a variety of prestigious track and field competitions. Competitors will face challenging events like the Blind Walk, Frisbee Put, and the notorious 100 and 10 Hurdles. May the most ocean tendie team win!
+        generate_heat_sheet(
+            name="Sean Dutton Memorial Ocean Tendie Invitational",
+            date="May 13, 2025",
+            location="Gesling Stadium",
+            host="Carnegie Mellon University",
+            description="""This prestigious event honors the legacy of Sean Dutton, featuring a variety of prestigious track and field competitions. Competitors will face challenging events like the Blind Walk, Frisbee Put, and the notorious 100 and 10 Hurdles. May the most ocean tendie team win!
             
 \\textbf{Special Rules:}
 \\begin{itemize}
@@ -457,7 +602,7 @@ if __name__ == "__main__":
   \\item stdDev competitors must maintain a minimum pace of 5:00/km
 \\end{itemize}
 """,
-                meet_history="""The Sean Dutton Memorial Ocean Tendie Invitational began in 2022 as a friendly competition between Track Club members. What started as a joke quickly evolved into an annual tradition with increasingly bizarre events and scoring methods along with grand slam style prize winnings funded solely by Aleksei Seletskiy. For more info on the history of the event, please visit the [Sean Dutton Memorial Ocean Tendie Invitational Wikipedia page].
+            meet_history="""The Sean Dutton Memorial Ocean Tendie Invitational began in 2022 as a friendly competition between Track Club members. What started as a joke quickly evolved into an annual tradition with increasingly bizarre events and scoring methods along with grand slam style prize winnings funded solely by Aleksei Seletskiy. For more info on the history of the event, please visit the [Sean Dutton Memorial Ocean Tendie Invitational Wikipedia page].
 
 \\vspace{0.5em}
 \\textbf{Past Champions:}
@@ -475,10 +620,10 @@ if __name__ == "__main__":
   \\item Frisbee Put: Coolin Mclaughlin (2022) - 18.7m throw using only his non-dominant hand
 \\end{itemize}
 """,
-                events=events,
-                start_time=datetime.strptime("2025-05-13 18:00", "%Y-%m-%d %H:%M"),
-                between_event_time=timedelta(minutes=3),
-            )
+            events=events,
+            start_time=datetime.fromisoformat("2025-05-13 18:00"),
+            between_event_time=timedelta(minutes=3),
+            out=f,
         )
     print("Heat sheet template generated as heat_sheet.tex")
     print(count_events_per_team(events))